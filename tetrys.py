@@ -35,11 +35,15 @@ import argparse
 import atexit
 import copy
 import logging
+import logging.handlers
+import mmap
 import curses
 from itertools import cycle, product
 import os
+import queue
 import random
 import signal
+import struct
 import sys
 import threading
 import time
@@ -131,6 +135,138 @@ def gen_p():
             yield piece
 gen_p = gen_p()
 
+class QueueLogHandler(logging.Handler):
+    """
+    Hand log records off to a background thread which passes them on to the
+    'target' handler in batches, so the game loop never waits on file I/O.
+    Records are formatted by this handler and each batch reaches 'target' as
+    a single record, so it is written, flushed and checked for rotation once.
+    If the writer falls behind by 'max_queued' records new records are
+    dropped rather than blocking the game.
+    """
+
+    def __init__(self, target, batch_size=256, max_queued=10000):
+        logging.Handler.__init__(self)
+        self.target = target
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.closing = False
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.writer = threading.Thread(target=self.write_records)
+        self.writer.daemon = True
+        self.writer.start()
+
+    def emit(self, record):
+        # Nothing would write records queued after the writer was told to stop
+        if self.closing:
+            return
+
+        # Format the message now, the args may be changed by the game
+        # before the writer thread gets around to this record
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+
+            if record.exc_info:
+                record.exc_text = self.formatter.formatException(record.exc_info)
+                record.exc_info = None
+
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def write_records(self):
+        done = False
+
+        while not done:
+            batch = [self.queue.get()]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                done = True
+                batch = [record for record in batch if record is not None]
+
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        self.acquire()
+        try:
+            dropped = self.dropped
+            self.dropped = 0
+        finally:
+            self.release()
+
+        if dropped:
+            batch.append(logging.makeLogRecord({
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': logging.getLevelName(logging.WARNING),
+                'msg': "dropped %d log records, the log writer fell behind" % dropped,
+            }))
+
+        if not batch:
+            return
+
+        try:
+            data = '\n'.join(self.format(record) for record in batch)
+        except Exception:
+            self.handleError(batch[0])
+            return
+
+        self.target.handle(logging.makeLogRecord({
+            'name': __name__,
+            'levelno': logging.INFO,
+            'levelname': logging.getLevelName(logging.INFO),
+            'msg': data,
+        }))
+
+    def close(self):
+        self.acquire()
+        try:
+            self.closing = True
+        finally:
+            self.release()
+
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        self.target.close()
+        logging.Handler.close(self)
+
+
+def setup_logging(filename, level, use_queue, max_bytes, backup_count):
+    """
+    Log to 'filename'. If 'use_queue' is True the writes happen on a
+    background thread which rotates the file once it reaches 'max_bytes'
+    (0 to never rotate), otherwise the file is never rotated.
+    """
+    formatter = logging.Formatter('%(asctime)s %(levelname)7s %(filename)12s: %(message)s')
+
+    if use_queue:
+        # The records reach the target already formatted by QueueLogHandler
+        target = logging.handlers.RotatingFileHandler(filename,
+                                                      maxBytes=max_bytes,
+                                                      backupCount=backup_count)
+        target.setFormatter(logging.Formatter('%(message)s'))
+        handler = QueueLogHandler(target)
+        handler.setFormatter(formatter)
+        atexit.register(handler.close)
+    else:
+        handler = logging.FileHandler(filename)
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
+
 FPS = 60
 PIECE_COUNT = len(Pieces)
 Speeds = [48, 45, 42, 39, 36, 33, 30, 27, 24, 21, 18, 15, 12, 10, 8, 6, 5, 4, 3, 2]
@@ -151,11 +287,14 @@ class Tetris:
         self.hoff = 0
         self.woff = 0
         self.cleared = 0
+        self.cleared_rows = []
         self.landing_height = 0
         self.drop_bonus = 0
+        self.best_moves_sequence = None
         self.lock = threading.RLock()
         self.continues = True
         self.shutdown = False
+        self.debug = log.isEnabledFor(logging.DEBUG)
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
 
@@ -175,6 +314,7 @@ class Tetris:
         self.save_hoff = copy.copy(self.hoff)
         self.save_woff = copy.copy(self.woff)
         self.save_cleared = copy.copy(self.cleared)
+        self.save_cleared_rows = copy.copy(self.cleared_rows)
         self.save_landing_height = copy.copy(self.landing_height)
         self.save_drop_bonus = copy.copy(self.drop_bonus)
         self.save_continues = copy.copy(self.continues)
@@ -191,6 +331,7 @@ class Tetris:
         self.hoff = copy.copy(self.save_hoff)
         self.woff = copy.copy(self.save_woff)
         self.cleared = copy.copy(self.save_cleared)
+        self.cleared_rows = copy.copy(self.save_cleared_rows)
         self.landing_height = copy.copy(self.save_landing_height)
         self.drop_bonus = copy.copy(self.save_drop_bonus)
         self.continues = copy.copy(self.save_continues)
@@ -205,24 +346,46 @@ class Tetris:
             for line in reversed(self.field)) +
             "\n" + corner + bottom * self.width + corner)
 
-    def new_p(self):
-        log.debug("Adding new piece")
-        self.cleared = 0
-        redo = True
+    def get_full_rows(self):
+        """
+        Return the indexes of the full rows under the current piece, only the
+        rows the piece landed in can have been filled
+        """
+        (piece, i, j) = self.current_piece
+        ph = len(piece)
+
+        return [row_index for row_index in range(i, min(i + ph, self.height))
+                if all(self.field[row_index])]
 
-        # Look to see if any rows should be cleared
-        while redo:
-            redo = False
+    def clear_lines(self):
+        """
+        Clear any full rows under the piece that just landed, shifting the
+        rows above them down. Return the indexes of the rows that were cleared.
+        """
+        if self.current_piece is None:
+            return []
 
-            for i in range(self.height):
-                if all(self.field[i]):
-                    self.cleared += 1
+        rows = self.get_full_rows()
 
-                    for j in range(i, self.height - 1):
-                        self.field[j] = self.field[j + 1]
+        if rows:
+            kept = [self.field[row_index] for row_index in range(rows[0], self.height)
+                    if row_index not in rows]
 
-                    self.field[self.height - 1] = [0 for _ in range(self.width)]
-                    redo = True
+            # Reuse the cleared rows as the new empty rows at the top
+            emptied = [self.field[row_index] for row_index in rows]
+            for line in emptied:
+                for column_index in range(self.width):
+                    line[column_index] = 0
+
+            self.field[rows[0]:] = kept + emptied
+
+        return rows
+
+    def new_p(self):
+        if self.debug:
+            log.debug("Adding new piece")
+        self.cleared_rows = self.clear_lines()
+        self.cleared = len(self.cleared_rows)
 
         if ((self.lines + self.cleared) // 10) > (self.lines // 10):
             self.level = min(self.level + 1, len(Speeds) - 1)
@@ -354,6 +517,42 @@ class Tetris:
             self.drop_bonus += 1
             return self.tick(add_next_piece)
 
+    def apply_move(self, c):
+        """
+        Apply one key from the player, or one move from ai_next_moves()
+        """
+        if c == ord("q"):
+            self.continues = False
+            log.info("User hit 'q'")
+
+        elif c == curses.KEY_LEFT:
+            if self.debug:
+                log.debug('Move LEFT')
+            self.left()
+
+        elif c == curses.KEY_RIGHT:
+            if self.debug:
+                log.debug('Move RIGHT')
+            self.right()
+
+        elif c == curses.KEY_UP:
+            if self.debug:
+                log.debug('Move UP')
+            self.rotate()
+
+        elif c == curses.KEY_DOWN:
+            if self.debug:
+                log.debug('Move DOWN')
+            self.down(True)
+
+        # Drop the piece all the way to the bottom
+        # elif c == curses.KEY_SPACEBAR:
+        elif c == ord("x") or c == 'DROP':
+            if self.debug:
+                log.debug('Move DROP')
+            while not self.down(True):
+                pass
+
     def start(self, use_ai):
         self.next_piece = next(gen_p)
         self.new_p()
@@ -376,7 +575,7 @@ class Tetris:
                 tmp[column_index].append(block)
 
         result = []
-        for (column_index, column) in tmp.iteritems():
+        for (column_index, column) in tmp.items():
             result.append(column)
         return result
 
@@ -494,15 +693,26 @@ class Tetris:
         # log.info("get_well_sums()       %d" % count)
         return count
 
-    def get_ai_score(self):
+    def get_ai_features(self):
         data = self.get_field_by_column()
 
-        score = ((self.get_landing_height()      * -4.500158825082766)  +
-                 (self.cleared                   *  3.4181268101392694) +
-                 (self.get_row_transitions()     * -3.2178882868487753) +
-                 (self.get_col_transitions(data) * -9.348695305445199)  +
-                 (self.get_holes(data)           * -7.899265427351652)  +
-                 (self.get_well_sums(data)       * -3.3855972247263626))
+        return (self.get_landing_height(),
+                self.cleared,
+                self.get_row_transitions(),
+                self.get_col_transitions(data),
+                self.get_holes(data),
+                self.get_well_sums(data))
+
+    def get_ai_score(self):
+        (landing_height, cleared, row_transitions,
+         col_transitions, holes, well_sums) = self.get_ai_features()
+
+        score = ((landing_height  * -4.500158825082766)  +
+                 (cleared         *  3.4181268101392694) +
+                 (row_transitions * -3.2178882868487753) +
+                 (col_transitions * -9.348695305445199)  +
+                 (holes           * -7.899265427351652)  +
+                 (well_sums       * -3.3855972247263626))
 
         # log.info("get_ai_score()        %s" % score)
         # log.info("\nCURRENT BOARD\n%s\n" % self.field_to_string())
@@ -564,6 +774,7 @@ class Tetris:
         """
         best_score = None
         best_score_moves = []
+        best_moves_sequence = None
         self.save_state()
 
         max_rotations = get_max_rotations(self.current_piece[0])
@@ -586,10 +797,12 @@ class Tetris:
             if best_score is None or score > best_score:
                 best_score = score
                 best_score_moves = moves
+                best_moves_sequence = seq
             elif score == best_score:
                 if len(moves) < len(best_score_moves):
                     best_score = score
                     best_score_moves = moves
+                    best_moves_sequence = seq
 
         if not best_score_moves:
             log.info("ai_next_moves: score %s, moves %s" % (best_score, best_score_moves))
@@ -597,11 +810,294 @@ class Tetris:
             raise Exception("no best_score_moves")
 
         # log.info("ai_next_moves: score %s, moves %s" % (best_score, moves_to_string(best_score_moves)))
+        self.best_moves_sequence = best_moves_sequence
         self.load_state()
         return best_score_moves
 
 
-def main(stdscr, use_ai):
+# Self-play positions are exported to a file made of a fixed size header
+# followed by fixed size records, see PositionWriter and PositionReader.
+POSITION_MAGIC = b'TTRS'
+POSITION_VERSION = 2
+POSITION_HEADER_SIZE = 32
+POSITION_FEATURES = ('landing_height', 'cleared', 'row_transitions',
+                     'col_transitions', 'holes', 'well_sums')
+
+# magic, version, height, width, feature count, record size, record count
+position_header = struct.Struct('<4sHBBB3xIQ')
+
+# The end of every record: piece index, pieces remaining, lines, topped out
+position_outcome = struct.Struct('<IIIB3x')
+
+
+def get_position_record(height):
+    """
+    Return the struct for one record, all fields are little endian:
+        height x uint16  board before the piece was placed, one bit mask per row
+        uint8            piece type
+        uint8 x 3        chosen placement (rotations, left moves, right moves)
+        float32 x 6      features of the chosen placement, see POSITION_FEATURES
+        uint32           index of this piece in its game, starting at 0
+        uint32           pieces the game went on to place after this one
+        uint32           lines the game went on to clear after this position
+        uint8            1 if the game ended by topping out, 0 if it was cut
+                         short by --max-pieces or Ctrl-C
+        3 bytes          padding
+
+    The lines cleared grow with the pieces remaining, so a game that was cut
+    short says little about the board beyond how many pieces were left.
+    """
+    return struct.Struct('<%dHBBBB%df' % (height, len(POSITION_FEATURES)) +
+                         position_outcome.format[1:])
+
+
+def read_position_header(mm, filename):
+    """
+    Return the height, width and record count from the header of a position
+    file, raising an Exception if it was not written by this version
+    """
+    (magic, version, height, width, feature_count,
+     record_size, count) = position_header.unpack_from(mm, 0)
+
+    if magic != POSITION_MAGIC or version != POSITION_VERSION:
+        raise Exception("%s is not a version %d position file" % (filename, POSITION_VERSION))
+
+    expected_size = get_position_record(height).size
+
+    if record_size != expected_size or feature_count != len(POSITION_FEATURES):
+        raise Exception("%s has %d byte records, expected %d" % (filename, record_size, expected_size))
+
+    return height, width, count
+
+
+class PositionWriter:
+    """
+    Append self-play positions to a memory-mapped file, adding to the
+    positions already in 'filename' if it exists. The file grows
+    'chunk_records' records at a time so only the mapping, never the whole
+    dataset, needs to be held in memory.
+    """
+
+    def __init__(self, filename, height, width, chunk_records=4096):
+        if width > 16:
+            raise Exception("Cannot pack a board %d wide into 16-bit rows" % width)
+
+        self.height, self.width = height, width
+        self.record = get_position_record(height)
+        self.chunk_records = chunk_records
+        self.mm = None
+
+        if os.path.exists(filename) and os.path.getsize(filename):
+            self.fh = open(filename, 'r+b')
+            self.mm = mmap.mmap(self.fh.fileno(), 0)
+            (file_height, file_width, self.count) = read_position_header(self.mm, filename)
+
+            if (file_height, file_width) != (height, width):
+                raise Exception("%s holds %dx%d boards, not %dx%d" %
+                                (filename, file_height, file_width, height, width))
+
+            self.capacity = self.count
+            self.grow()
+        else:
+            self.fh = open(filename, 'w+b')
+            self.count = 0
+            self.capacity = 0
+            self.grow()
+            position_header.pack_into(self.mm, 0, POSITION_MAGIC, POSITION_VERSION, height,
+                                      width, len(POSITION_FEATURES), self.record.size, 0)
+
+        self.game_start = self.count
+
+    def grow(self):
+        if self.mm is not None:
+            self.mm.close()
+
+        self.capacity += self.chunk_records
+        self.fh.truncate(POSITION_HEADER_SIZE + self.capacity * self.record.size)
+        self.mm = mmap.mmap(self.fh.fileno(), 0)
+
+    def append(self, field, lines, piece_index, piece_type, moves_sequence, features):
+        """
+        Record placing piece number 'piece_index', a 'piece_type', on 'field'
+        using 'moves_sequence' after 'lines' lines have been cleared. The
+        outcome is filled in by end_game().
+        """
+        if self.count == self.capacity:
+            self.grow()
+
+        # Hold the lines cleared so far until we know how the game ends
+        args = self.field_to_masks(field) + [piece_type]
+        args.extend(moves_sequence)
+        args.extend(features)
+        args.extend((piece_index, 0, lines, 0))
+
+        self.record.pack_into(self.mm, POSITION_HEADER_SIZE + self.count * self.record.size, *args)
+        self.count += 1
+
+    def field_to_masks(self, field):
+        masks = []
+
+        for line in field:
+            mask = 0
+            for (column_index, block) in enumerate(line):
+                if block:
+                    mask |= 1 << column_index
+            masks.append(mask)
+
+        return masks
+
+    def end_game(self, final_lines, pieces_placed, topped_out):
+        """
+        Fill in the outcome of every position in the game that just ended:
+        the pieces placed and lines cleared from that position to the end of
+        the game, and whether the game ended by topping out
+        """
+        outcome_offset = self.record.size - position_outcome.size
+
+        for index in range(self.game_start, self.count):
+            offset = POSITION_HEADER_SIZE + index * self.record.size + outcome_offset
+            (piece_index, _, lines, _) = position_outcome.unpack_from(self.mm, offset)
+            position_outcome.pack_into(self.mm, offset, piece_index,
+                                       pieces_placed - piece_index - 1,
+                                       final_lines - lines,
+                                       1 if topped_out else 0)
+
+        self.game_start = self.count
+        struct.pack_into('<Q', self.mm, position_header.size - 8, self.count)
+
+    def close(self):
+        # Positions of an unfinished game have no outcome so drop them
+        self.count = self.game_start
+        struct.pack_into('<Q', self.mm, position_header.size - 8, self.count)
+        self.mm.close()
+        self.fh.truncate(POSITION_HEADER_SIZE + self.count * self.record.size)
+        self.fh.close()
+
+
+class PositionReader:
+    """
+    Read back a file written by PositionWriter without copying it into memory.
+    'records' is a read-only buffer of every record, ready for something like
+    numpy.frombuffer().
+    """
+
+    def __init__(self, filename):
+        self.fh = open(filename, 'rb')
+        self.mm = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
+        (self.height, self.width, self.count) = read_position_header(self.mm, filename)
+        self.record = get_position_record(self.height)
+        self.records = memoryview(self.mm)[POSITION_HEADER_SIZE:POSITION_HEADER_SIZE + self.count * self.record.size]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """
+        Return (row masks, piece type, (rotations, left moves, right moves),
+        features, piece index, pieces remaining, lines cleared, topped out)
+        """
+        if index < 0:
+            index += self.count
+
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+
+        values = self.record.unpack_from(self.mm, POSITION_HEADER_SIZE + index * self.record.size)
+        (piece_index, pieces_remaining, lines, topped_out) = values[-4:]
+        return (values[:self.height],
+                values[self.height],
+                values[self.height + 1:self.height + 4],
+                values[self.height + 4:-4],
+                piece_index,
+                pieces_remaining,
+                lines,
+                bool(topped_out))
+
+    def close(self):
+        self.records.release()
+        self.mm.close()
+        self.fh.close()
+
+
+def self_play(filename, games, max_pieces):
+    """
+    Let the AI play 'games' games without a screen, exporting every position
+    it sees along with the placement it chose to 'filename', after any
+    positions already in it. A game is ended after 'max_pieces' pieces
+    (0 for no limit), the AI rarely tops out.
+    """
+    game = None
+    writer = PositionWriter(filename, 20, 10)
+
+    try:
+        for game_number in range(games):
+            game = Tetris(20, 10)
+            game.start(True)
+
+            while game.continues and not game.shutdown:
+                moves = game.ai_next_moves()
+                moves_sequence = game.best_moves_sequence
+
+                # Record the board without the piece that is about to be placed
+                (piece, i, j) = game.current_piece
+                piece_type = piece[0][1]
+                game.remove_p(piece, i, j)
+                board = [copy.copy(line) for line in game.field]
+                game.add_p(piece, i, j)
+
+                # down(False) does not clear lines, so unlike the cleared the AI
+                # scores with, export the lines this placement would clear
+                game.get_ai_score_for_moves(moves_sequence)
+                game.cleared = len(game.get_full_rows())
+                features = game.get_ai_features()
+                game.load_state()
+                writer.append(board, game.lines, game.pieces_placed, piece_type,
+                              moves_sequence, features)
+
+                # main() moves the next piece down once after each drop too
+                moves.append(curses.KEY_DOWN)
+
+                for c in moves:
+                    game.apply_move(c)
+
+                game.pieces_placed += 1
+
+                if max_pieces and game.pieces_placed >= max_pieces:
+                    break
+
+            # Keep the positions of a game that was cut short, they are marked
+            # as not having topped out. new_p() clears continues on a top out.
+            writer.end_game(game.lines, game.pieces_placed, not game.continues)
+            log.info("game %d: %d pieces, %d lines, %d positions exported",
+                     game_number + 1, game.pieces_placed, game.lines, writer.count)
+
+            if game.shutdown:
+                break
+    finally:
+        writer.close()
+
+    return game
+
+
+def positive_int(value):
+    number = int(value)
+
+    if number < 1:
+        raise argparse.ArgumentTypeError("%s is not a positive number" % value)
+
+    return number
+
+
+def non_negative_int(value):
+    number = int(value)
+
+    if number < 0:
+        raise argparse.ArgumentTypeError("%s is a negative number" % value)
+
+    return number
+
+
+def main(stdscr, use_ai, log_every):
     curses.start_color()
     curses.init_color(7, 1000, 627, 0)
     curses.init_color(8, 1000, 1000, 1000)
@@ -626,32 +1122,7 @@ def main(stdscr, use_ai):
             #if use_ai:
             #    time.sleep(0.1)
 
-            if c == ord("q"):
-                game.continues = False
-                log.info("User hit 'q'")
-
-            elif c == curses.KEY_LEFT:
-                log.debug('Move LEFT')
-                game.left()
-
-            elif c == curses.KEY_RIGHT:
-                log.debug('Move RIGHT')
-                game.right()
-
-            elif c == curses.KEY_UP:
-                log.debug('Move UP')
-                game.rotate()
-
-            elif c == curses.KEY_DOWN:
-                log.debug('Move DOWN')
-                game.down(True)
-
-            # Drop the piece all the way to the bottom
-            # elif c == curses.KEY_SPACEBAR:
-            elif c == ord("x") or c == 'DROP':
-                log.debug('Move DROP')
-                while not game.down(True):
-                    pass
+            game.apply_move(c)
 
             for i, line in enumerate(game.curses_str().splitlines()):
                 for j, c in enumerate(line):
@@ -670,7 +1141,9 @@ def main(stdscr, use_ai):
             stdscr.refresh()
 
         game.pieces_placed += 1
-        log.info("%d pieces, %d lines" % (game.pieces_placed, game.lines))
+
+        if log_every and game.pieces_placed % log_every == 0:
+            log.info("%d pieces, %d lines", game.pieces_placed, game.lines)
         # log.info("\nCURRENT BOARD\n%s\n" % game.field_to_string())
 
     # raw_input('Game Over...Paused') # this locks up...but does allow you to see the board when the game ended
@@ -679,21 +1152,41 @@ def main(stdscr, use_ai):
 
 if __name__ == "__main__":
 
-    logging.basicConfig(filename='/tmp/tetris.log',
-                        level=logging.INFO,
-                        format='%(asctime)s %(levelname)7s %(filename)12s: %(message)s')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ai', action='store_true', help='Use AI to auto play', default=False)
+    parser.add_argument('--export', default=None,
+                        help='Play --games games with the AI without a screen and export every position to this file')
+    parser.add_argument('--games', type=positive_int, default=1,
+                        help='Number of games to play with --export (default %(default)s)')
+    parser.add_argument('--max-pieces', type=non_negative_int, default=1000,
+                        help='End each --export game after this many pieces, 0 for no limit (default %(default)s)')
+    parser.add_argument('--debug', action='store_true', help='Log every move', default=False)
+    parser.add_argument('--log-queue', action='store_true', default=False,
+                        help='Write the log from a background thread')
+    parser.add_argument('--log-every', type=int, default=1,
+                        help='Log progress every N pieces, 0 to disable (default %(default)s)')
+    parser.add_argument('--log-max-bytes', type=int, default=10 * 1024 * 1024,
+                        help='With --log-queue rotate the log at this size, 0 to disable (default %(default)s)')
+    parser.add_argument('--log-backups', type=int, default=1,
+                        help='Number of rotated logs to keep with --log-queue (default %(default)s)')
+    args = parser.parse_args()
+
+    setup_logging('/tmp/tetris.log',
+                  logging.DEBUG if args.debug else logging.INFO,
+                  args.log_queue,
+                  args.log_max_bytes,
+                  args.log_backups)
     log = logging.getLogger(__name__)
 
     # Color the errors and warnings in red
     logging.addLevelName(logging.ERROR, "\033[91m  %s\033[0m" % logging.getLevelName(logging.ERROR))
     logging.addLevelName(logging.WARNING, "\033[91m%s\033[0m" % logging.getLevelName(logging.WARNING))
 
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--ai', action='store_true', help='Use AI to auto play', default=False)
-    args = parser.parse_args()
-
     try:
-        game = curses.wrapper(main, args.ai)
+        if args.export:
+            game = self_play(args.export, args.games, args.max_pieces)
+        else:
+            game = curses.wrapper(main, args.ai, args.log_every)
         print("Game over!")
         print("Lines: {}, Level: {}, Score: {}".format(game.lines, game.level, game.score))
     except Exception as e: